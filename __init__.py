@@ -2,3 +2,4 @@ from .src.xml import PageXML
 from .src.page import Page
 from .src.element import Element
 from .src.types import XMLType
+from .src.archive import ArchiveWriter, ArchiveReader
@@ -0,0 +1,282 @@
+# Copyright 2024 Janik Haitz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import json
+import mmap
+import struct
+import operator
+import tempfile
+from array import array
+from typing import Self, Optional, Union, Iterator, BinaryIO, SupportsIndex
+from pathlib import Path
+
+from lxml import etree
+
+from .xml import PageXML
+
+
+# Archive layout:
+#   MAGIC | header | documents | index segment | footer | documents | index segment | footer | ...
+# Every append writes its documents, an index segment with only the new entries and a footer that points
+# to the previous footer. The header points to the last footer and is only updated once the new segment
+# is on disk, so the previous segments stay valid until then. Readers merge the segments on open.
+MAGIC = b'PXMLARC1'
+HEADER = struct.Struct('<Q')  # position of the last footer
+FOOTER = struct.Struct('<QQQQ8s')  # index offset, index length, previous footer position, document count, magic
+
+
+def _image_filenames(tree: etree.Element) -> list[str]:
+    """ Returns the imageFilename attributes of all pages of a xml etree element """
+    return list([fn for page in tree.findall('./{*}Page') if (fn := page.get('imageFilename')) is not None])
+
+
+def _read_header(f: BinaryIO) -> int:
+    """ Returns the position of the last footer of an archive """
+    f.seek(0)
+    header = f.read(len(MAGIC) + HEADER.size)
+    if len(header) < len(MAGIC) + HEADER.size or header[:len(MAGIC)] != MAGIC:
+        raise ValueError('Not a PageXML archive')
+    return HEADER.unpack(header[len(MAGIC):])[0]
+
+
+def _read_footer(f: BinaryIO, position: int) -> tuple[int, int, int, int]:
+    """ Returns index offset, index length, previous footer position and document count of a footer """
+    f.seek(position)
+    footer = f.read(FOOTER.size)
+    if position == 0 or len(footer) != FOOTER.size:
+        raise ValueError('PageXML archive has no valid index (was the writer closed?)')
+    offset, length, previous, count, magic = FOOTER.unpack(footer)
+    if magic != MAGIC or offset + length != position:
+        raise ValueError('PageXML archive has no valid index (was the writer closed?)')
+    return offset, length, previous, count
+
+
+def _read_index(f: BinaryIO, position: int) -> list:
+    """ Read and merge the index segments, starting at the footer at the given position """
+    segments = []
+    while position != 0:
+        offset, length, position, _ = _read_footer(f, position)
+        f.seek(offset)
+        segments.append(json.loads(f.read(length))['entries'])
+    return list([entry for segment in reversed(segments) for entry in segment])
+
+
+class ArchiveWriter:
+    def __init__(self, fp: Union[Path, str], append: bool = False):
+        """
+        Write multiple PageXML documents into a single archive file.
+        If append is set, new documents are added to an existing archive. Otherwise, a new archive is
+        written to a temporary file that replaces the file at fp on close.
+        """
+        self._fp: Path = Path(fp)
+        self._tmp: Optional[Path] = None
+        self._entries: list = []  # new entries: [name, offset, length, image filenames]
+        if append and self._fp.exists():
+            self._file = open(self._fp, 'r+b')
+            try:
+                self._previous: int = _read_header(self._file)
+                self._count: int = _read_footer(self._file, self._previous)[3]
+            except BaseException:
+                self._file.close()
+                raise
+            # drop leftovers of interrupted appends
+            self._start: int = self._previous + FOOTER.size
+            self._file.seek(self._start)
+            self._file.truncate()
+        else:
+            fd, tmp = tempfile.mkstemp(prefix=f'.{self._fp.name}.', suffix='.tmp', dir=self._fp.parent)
+            self._tmp = Path(tmp)
+            self._file = os.fdopen(fd, 'w+b')
+            self._file.write(MAGIC)
+            self._file.write(HEADER.pack(0))
+            self._previous: int = 0
+            self._count: int = 0
+            self._start: int = self._file.tell()
+
+    def __len__(self) -> int:
+        """ Return the number of documents """
+        return self._count + len(self._entries)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type, *args) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def add_bytes(self, data: bytes, name: str) -> None:
+        """ Add a serialized PageXML document to the archive """
+        tree = etree.fromstring(data)
+        offset = self._file.tell()
+        self._file.write(data)
+        self._entries.append([str(name), offset, len(data), _image_filenames(tree)])
+
+    def add_xml(self, fp: Union[Path, str], name: Optional[str] = None) -> None:
+        """ Add a PageXML file to the archive. The file name is used as name by default """
+        with open(fp, 'rb') as f:
+            self.add_bytes(f.read(), Path(fp).name if name is None else name)
+
+    def add(self, pxml: PageXML, name: str) -> None:
+        """ Add a PageXML object to the archive """
+        self.add_bytes(etree.tostring(pxml.to_etree(), encoding='utf-8', xml_declaration=True), name)
+
+    def close(self) -> None:
+        """ Write the index segment of the new documents and close the archive """
+        if self._file.closed:
+            return
+        if len(self._entries) > 0 or self._tmp is not None:
+            offset = self._file.tell()
+            index = json.dumps({'entries': self._entries}, separators=(',', ':')).encode('utf-8')
+            self._file.write(index)
+            self._file.write(FOOTER.pack(offset, len(index), self._previous, len(self), MAGIC))
+            self._sync()
+            # switch to the new segment only after it is on disk
+            self._file.seek(len(MAGIC))
+            self._file.write(HEADER.pack(offset + len(index)))
+            self._sync()
+        self._file.close()
+        if self._tmp is not None:
+            os.replace(self._tmp, self._fp)
+
+    def discard(self) -> None:
+        """ Remove the documents added since opening and close the archive without changing the index """
+        if self._file.closed:
+            return
+        if self._tmp is not None:
+            self._file.close()
+            self._tmp.unlink()
+        else:
+            self._file.truncate(self._start)
+            self._file.close()
+
+    def _sync(self) -> None:
+        """ Flush the written data to disk """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+
+class ArchiveReader:
+    def __init__(self, fp: Union[Path, str]):
+        """
+        Random access to the documents of a PageXML archive.
+        The archive is memory mapped and documents are only parsed when accessed. Readers can be
+        pickled (e.g. for DataLoader workers), each process reads the index and maps the archive on its own.
+        Only documents indexed when opening the reader are visible. If names or imageFilenames
+        occur multiple times, the last added document is returned.
+        """
+        self._fp: Path = Path(fp)
+        with open(self._fp, 'rb') as f:
+            self._footer: int = _read_header(f)
+        self._load()
+
+    def __len__(self) -> int:
+        """ Return the number of documents """
+        return len(self._offsets)
+
+    def __iter__(self) -> Iterator[str]:
+        """ Iterate through the document names """
+        return iter(self._names)
+
+    def __getitem__(self, key: Union[SupportsIndex, str]) -> Optional[PageXML]:
+        """ Get document by index or name with brackets operator """
+        if isinstance(key, str):
+            return self.get(key)
+        return self.read(key)
+
+    def __contains__(self, key: str) -> bool:
+        """ Check if a document name exists """
+        return key in self._lookup
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __getstate__(self) -> dict:
+        """ Only pickle the path and the index position, each process reads the index on its own """
+        return {'_fp': self._fp, '_footer': self._footer}
+
+    def __setstate__(self, state: dict) -> None:
+        """ Read the index of the pickled reader """
+        self.__dict__.update(state)
+        self._load()
+
+    def _load(self) -> None:
+        """ Read the index """
+        self._file = None
+        self._data: Optional[mmap.mmap] = None
+        self._pid: Optional[int] = None
+        with open(self._fp, 'rb') as f:
+            entries = _read_index(f, self._footer)
+        self._names: list[str] = list([e[0] for e in entries])
+        self._offsets: array = array('Q', [e[1] for e in entries])
+        self._lengths: array = array('Q', [e[2] for e in entries])
+        self._lookup: dict[str, int] = {e[0]: i for i, e in enumerate(entries)}
+        self._images: dict[str, int] = {fn: i for i, e in enumerate(entries) for fn in e[3]}
+
+    def _map(self) -> mmap.mmap:
+        """ Memory map the archive. Maps again if used in a forked process """
+        if self._data is None or self._pid != os.getpid():
+            # close handles inherited from the parent process
+            self.close()
+            self._file = open(self._fp, 'rb')
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._pid = os.getpid()
+        return self._data
+
+    @property
+    def names(self) -> list[str]:
+        """ List of document names """
+        return list(self._names)
+
+    @property
+    def image_filenames(self) -> list[str]:
+        """ List of image filenames of all pages """
+        return list(self._images.keys())
+
+    def read_bytes(self, index: SupportsIndex) -> bytes:
+        """ Returns the serialized document at the given index """
+        index = operator.index(index)
+        if not -len(self) <= index < len(self):
+            raise IndexError(f'Document index {index} out of range')
+        offset, length = self._offsets[index], self._lengths[index]
+        return self._map()[offset:offset+length]
+
+    def read(self, index: SupportsIndex) -> PageXML:
+        """ Parse the document at the given index """
+        parser = etree.XMLParser(remove_blank_text=True)
+        return PageXML.from_etree(etree.fromstring(self.read_bytes(index), parser))
+
+    def get(self, name: str) -> Optional[PageXML]:
+        """ Parse the document with the given name. None if nothing found """
+        if (index := self._lookup.get(name, None)) is not None:
+            return self.read(index)
+        return None
+
+    def find_image(self, image_filename: str) -> Optional[PageXML]:
+        """ Parse the document containing a page with the given imageFilename. None if nothing found """
+        if (index := self._images.get(image_filename, None)) is not None:
+            return self.read(index)
+        return None
+
+    def close(self) -> None:
+        """ Close the memory map """
+        if self._data is not None:
+            self._data.close()
+            self._file.close()
+        self._file, self._data, self._pid = None, None, None
@@ -0,0 +1,273 @@
+# Copyright 2024 Janik Haitz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import weakref
+from typing import Self, Optional, Any
+
+
+class CowDict(dict):
+    """ Dict that notifies its owner before it is changed """
+    __slots__ = ('_owner',)
+
+    def __init__(self, owner: Optional['CopyOnWrite'] = None, data: Any = ()):
+        super().__init__(data)
+        self._owner = None if owner is None else weakref.ref(owner)
+
+    def __reduce__(self):
+        # the owner reference is restored by CopyOnWrite.__setstate__
+        return type(self), (None, dict(self))
+
+    def _touch(self) -> None:
+        if self._owner is not None and (owner := self._owner()) is not None:
+            owner._cow_write()
+
+
+class CowList(list):
+    """ List that notifies its owner before it is changed """
+    __slots__ = ('_owner',)
+
+    def __init__(self, owner: Optional['CopyOnWrite'] = None, data: Any = ()):
+        super().__init__(data)
+        self._owner = None if owner is None else weakref.ref(owner)
+
+    def __reduce__(self):
+        # the owner reference is restored by CopyOnWrite.__setstate__
+        return type(self), (None, list(self))
+
+    def _touch(self) -> None:
+        if self._owner is not None and (owner := self._owner()) is not None:
+            owner._cow_write()
+
+
+class CowChildren(CowList):
+    """ List of child objects that registers its owner as their parent """
+    __slots__ = ()
+
+    def _adopt(self, children: list) -> None:
+        if self._owner is not None and (owner := self._owner()) is not None:
+            for child in children:
+                if isinstance(child, CopyOnWrite):
+                    child._cow_adopt(owner)
+
+    def append(self, child: Any) -> None:
+        super().append(child)
+        self._adopt([child])
+
+    def insert(self, index: int, child: Any) -> None:
+        super().insert(index, child)
+        self._adopt([child])
+
+    def extend(self, children: Any) -> None:
+        children = list(children)
+        super().extend(children)
+        self._adopt(children)
+
+    def __iadd__(self, children: Any) -> Self:
+        children = list(children)
+        super().__iadd__(children)
+        self._adopt(children)
+        return self
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        value = list(value) if isinstance(key, slice) else value
+        super().__setitem__(key, value)
+        self._adopt(value if isinstance(key, slice) else [value])
+
+
+def _notify(cls: type, names: tuple[str, ...]) -> None:
+    """ Wrap the mutating methods of a container class """
+    for name in names:
+        def method(self, *args, _method=getattr(cls.__base__, name), **kwargs):
+            self._touch()
+            return _method(self, *args, **kwargs)
+        method.__name__ = name
+        setattr(cls, name, method)
+
+
+_notify(CowDict, ('__setitem__', '__delitem__', '__ior__', 'clear', 'pop', 'popitem', 'setdefault', 'update'))
+_notify(CowList, ('__setitem__', '__delitem__', '__iadd__', '__imul__', 'append', 'extend', 'insert', 'pop',
+                  'remove', 'clear', 'sort', 'reverse'))
+
+
+class Snapshot:
+    """ Clock value of a clone. Alive as long as a clone can still read the state from that time """
+    __slots__ = ('clock', '__weakref__')
+
+    def __init__(self, clock: int):
+        self.clock: int = clock
+        _snapshots.add(weakref.ref(self, _release))
+
+
+_snapshots: set[weakref.ref] = set()  # keeps the release callbacks of live snapshots
+_tracked: weakref.WeakSet = weakref.WeakSet()  # objects with recorded history
+_pruning: list[bool] = [False, False]  # pruning in progress, pruning requested again
+
+
+def _release(ref: weakref.ref) -> None:
+    """ Drop the history that no clone can read anymore after a snapshot was released """
+    _snapshots.discard(ref)
+    if _pruning[0]:
+        _pruning[1] = True
+        return
+    _pruning[0] = True
+    try:
+        _pruning[1] = True
+        while _pruning[1]:
+            _pruning[1] = False
+            for obj in list(_tracked):
+                obj._cow_prune()
+    finally:
+        _pruning[0] = False
+
+
+class CopyOnWrite:
+    """
+    Base class for objects that can be cloned in constant time.
+    A clone shares the state of its source until one side changes it. Every clone() takes a snapshot of the
+    global clock. The source and, through their parents, all of its descendants can see the live snapshots,
+    so the first change of such an object keeps a copy of its previous state for the clones. Child objects of
+    a clone are only cloned when they are accessed. The history is dropped once no clone can read it anymore.
+    """
+    _clock: int = 0
+    _cow_state: tuple[str, ...] = ()  # names of all attributes that make up the state
+    _cow_children: Optional[str] = None  # name of the list of child objects
+    _cow_pins: Any = ()  # snapshots taken from this object or needed by its lazy child objects
+    _cow_parents: Any = ()  # weak references to the objects this object was added to
+
+    def __init__(self):
+        self._since: int = CopyOnWrite._clock  # clock value since which the current state is valid
+        self._history: list[tuple[int, tuple]] = []  # previous states, needed by clones
+        # snapshot to clone the child objects at, if not done yet, and the object the snapshot was taken from
+        self._lazy: Optional[tuple[Snapshot, CopyOnWrite]] = None
+
+    def __getstate__(self) -> dict:
+        """ Only copy or pickle the own state, not the source of a clone or the history """
+        self._cow_resolve()
+        return {name: getattr(self, name) for name in self._cow_state}
+
+    def __setstate__(self, state: dict) -> None:
+        """ Restore the owner of the containers after copying or unpickling """
+        CopyOnWrite.__init__(self)
+        self.__dict__.update(state)
+        for name in self._cow_state:
+            if isinstance(value := getattr(self, name), (CowDict, CowList)):
+                value._owner = weakref.ref(self)
+            if isinstance(value, CowChildren):
+                value._adopt(value)
+
+    def __copy__(self) -> Self:
+        """ A shallow copy is a clone, so both objects stay independent """
+        return self.clone()
+
+    def _cow_adopt(self, parent: 'CopyOnWrite') -> None:
+        """ Register a parent, its snapshots also cover this object """
+        if len(self._cow_parents) == 0:
+            self._cow_parents = [weakref.ref(parent)]
+            return
+        parents = [ref for ref in self._cow_parents if (p := ref()) is not None and p is not parent]
+        parents.append(weakref.ref(parent))
+        self._cow_parents = parents
+
+    def _cow_pin(self, snapshot: Snapshot) -> None:
+        """ Register a snapshot that covers this object """
+        if not isinstance(self._cow_pins, weakref.WeakSet):
+            self._cow_pins = weakref.WeakSet()
+        self._cow_pins.add(snapshot)
+
+    def _cow_clocks(self) -> list[int]:
+        """ Clock values of the live snapshots that cover this object """
+        clocks, seen, todo = [], set(), [self]
+        while todo:
+            obj = todo.pop()
+            if id(obj) in seen:
+                continue
+            seen.add(id(obj))
+            clocks.extend(snapshot.clock for snapshot in obj._cow_pins)
+            todo.extend(parent for ref in obj._cow_parents if (parent := ref()) is not None)
+        return clocks
+
+    def _cow_write(self) -> None:
+        """ Keep the current state for clones before it is changed """
+        if self._since < CopyOnWrite._clock:
+            clocks = self._cow_clocks()
+            if any(clock >= self._since for clock in clocks):
+                state = tuple(type(v).__mro__[-2](v) if isinstance(v, (CowDict, CowList)) else v
+                              for v in (getattr(self, name) for name in self._cow_state))
+                self._history.append((self._since, (state, self._lazy)))
+                _tracked.add(self)
+            self._since = CopyOnWrite._clock
+            if len(self._history) > 0:
+                self._cow_prune(clocks)
+
+    def _cow_prune(self, clocks: Optional[list[int]] = None) -> None:
+        """ Drop the states no live snapshot can read """
+        clocks = self._cow_clocks() if clocks is None else clocks
+        ends = [since for since, _ in self._history[1:]] + [self._since]
+        self._history = [entry for entry, end in zip(self._history, ends)
+                         if any(entry[0] <= clock < end for clock in clocks)]
+        if len(self._history) == 0:
+            _tracked.discard(self)
+
+    def _cow_state_at(self, clock: int) -> tuple[tuple, Optional[tuple[Snapshot, 'CopyOnWrite']]]:
+        """ Returns the state and the child snapshot at the given clock value """
+        if clock >= self._since:
+            return tuple(getattr(self, name) for name in self._cow_state), self._lazy
+        for since, state in reversed(self._history):
+            if since <= clock:
+                return state
+        raise ValueError(f'No state recorded at clock {clock}')
+
+    def _cow_clone(self, snapshot: Snapshot) -> Self:
+        """ Create a clone with the state of the given snapshot. The state is read on first access """
+        self._cow_pin(snapshot)
+        clone = object.__new__(type(self))
+        clone._since = CopyOnWrite._clock
+        clone._history = []
+        clone._cow_source = (self, snapshot)
+        return clone
+
+    def __getattr__(self, name: str) -> Any:
+        """ Read the state of a clone from its source on first access """
+        if name.startswith('__') or (source := self.__dict__.pop('_cow_source', None)) is None:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        source, snapshot = source
+        state, lazy = source._cow_state_at(snapshot.clock)
+        for key, value in zip(self._cow_state, state):
+            if key == self._cow_children:
+                value = CowChildren(self, value)
+            elif isinstance(value, dict):
+                value = CowDict(self, value)
+            elif isinstance(value, list):
+                value = CowList(self, value)
+            setattr(self, key, value)
+        self._lazy = None
+        if self._cow_children is not None and len(getattr(self, self._cow_children)) > 0:
+            # the child objects still belong to the source, which keeps them covered by the snapshot
+            self._lazy = (snapshot, source) if lazy is None else lazy
+        return getattr(self, name)
+
+    def _cow_resolve(self) -> None:
+        """ Clone the child objects of a clone before they are used """
+        if self._lazy is not None:
+            children = getattr(self, self._cow_children)
+            clones = [child._cow_clone(self._lazy[0]) for child in children]
+            self._cow_write()
+            children[:] = clones
+            self._lazy = None
+
+    def clone(self) -> Self:
+        """ Create a copy-on-write clone. The clone shares its state with the source until one side changes it """
+        snapshot = Snapshot(CopyOnWrite._clock)
+        CopyOnWrite._clock += 1
+        return self._cow_clone(snapshot)
@@ -17,13 +17,18 @@ from typing import Self, Optional, Union
 from lxml import etree
 
 from .types import XMLType
+from .cow import CopyOnWrite, CowDict, CowChildren
 
 
-class Element:
+class Element(CopyOnWrite):
+    _cow_state = ('_xmltype', '_attributes', '_elements', '_text')
+    _cow_children = '_elements'
+
     def __init__(self, xmltype: XMLType, attributes: Optional[dict[str, str]] = None):
+        super().__init__()
         self._xmltype: XMLType = xmltype
-        self._attributes: dict[str, str] = {} if attributes is None else attributes
-        self._elements: list[Element] = []
+        self._attributes: dict[str, str] = CowDict(self, {} if attributes is None else attributes)
+        self._elements: list[Element] = CowChildren(self)
         self._text: Optional[str] = None
 
     def __len__(self) -> int:
@@ -32,6 +37,7 @@ class Element:
 
     def __iter__(self) -> Self:
         """ Iterate through the list of elements """
+        self._cow_resolve()
         self.__n = 0
         return self
 
@@ -47,6 +53,7 @@ class Element:
     def __getitem__(self, key: Union[int, str]) -> Optional[Union[Self, str]]:
         """ Get attribute or element with brackets operator """
         if isinstance(key, int) and len(self._elements) > 0:
+            self._cow_resolve()
             return self._elements[min(key, len(self._elements)-1)]
         elif isinstance(key, str) and key in self._attributes:
             return self._attributes[key]
@@ -55,6 +62,7 @@ class Element:
     def __setitem__(self, key: Union[int, str], value: Union[Self, str]) -> None:
         """ Set attribute or element with brackets operator """
         if isinstance(key, int) and isinstance(value, Element) and len(self._elements) > 0:
+            self._cow_resolve()
             self._elements[min(key, len(self._elements)-1)] = value
         elif isinstance(key, str):
             self._attributes[key] = str(value)
@@ -64,6 +72,7 @@ class Element:
         if isinstance(key, str):
             return key in self._attributes
         elif isinstance(key, Element):
+            self._cow_resolve()
             return key in self._elements
         return False
 
@@ -84,6 +93,7 @@ class Element:
 
     def to_etree(self) -> etree.Element:
         """ Convert the Element object to a xml etree element """
+        self._cow_resolve()
         # create element
         element = etree.Element(self._xmltype.value, **self._attributes)
         if self._text is not None:
@@ -136,11 +146,13 @@ class Element:
     @text.setter
     def text(self, value: Optional[str]) -> None:
         """ Set the element text """
+        self._cow_write()
         self._text = None if value is None else str(value)
 
     @property
     def elements(self) -> list[Self]:
         """ Get the list of elements """
+        self._cow_resolve()
         return self._elements
 
     def is_region(self) -> bool:
@@ -164,6 +176,7 @@ class Element:
 
     def add_element(self, element: Self, index: Optional[int] = None) -> None:
         """ Add an element to the elements list. """
+        self._cow_resolve()
         if index is None:
             self._elements.append(element)
         else:
@@ -177,6 +190,7 @@ class Element:
 
     def remove_element(self, element: Union[int, Self]) -> Optional[Self]:
         """ Remove an element from the elements list """
+        self._cow_resolve()
         if isinstance(element, int) and element < len(self._elements):
             return self._elements.pop(element)
         elif isinstance(element, Element) and element in self._elements:
@@ -186,6 +200,7 @@ class Element:
 
     def get_coords(self) -> Optional[Self]:
         """ Returns the first Coords element. None if nothing found """
+        self._cow_resolve()
         for element in self._elements:
             if element.xmltype == XMLType.Coords:
                 return element
@@ -193,6 +208,7 @@ class Element:
 
     def get_baseline(self) -> Optional[Self]:
         """ Returns the first Baseline element. None if nothing found """
+        self._cow_resolve()
         for element in self._elements:
             if element.xmltype == XMLType.Baseline:
                 return element
@@ -201,3 +217,4 @@ class Element:
     def clear(self):
         """ Remove all elements """
         self._elements.clear()
+        self._lazy = None
@@ -18,13 +18,18 @@ from lxml import etree
 
 from .types import XMLType
 from .element import Element
+from .cow import CopyOnWrite, CowDict, CowList, CowChildren
 
 
-class Page:
+class Page(CopyOnWrite):
+    _cow_state = ('_attributes', '_ro', '_elements')
+    _cow_children = '_elements'
+
     def __init__(self, attributes: Optional[dict[str, str]] = None):
-        self._attributes: dict[str, str] = {} if attributes is None else attributes
-        self._ro: list[str] = []  # reading order by region id's
-        self._elements: list[Element] = []
+        super().__init__()
+        self._attributes: dict[str, str] = CowDict(self, {} if attributes is None else attributes)
+        self._ro: list[str] = CowList(self)  # reading order by region id's
+        self._elements: list[Element] = CowChildren(self)
 
     def __len__(self) -> int:
         """ Return the number of elements """
@@ -32,6 +37,7 @@ class Page:
 
     def __iter__(self) -> Self:
         """ Iterate through the list of elements """
+        self._cow_resolve()
         self.__n = 0
         return self
 
@@ -47,6 +53,7 @@ class Page:
     def __getitem__(self, key: Union[str, int]) -> Optional[Union[Element, str]]:
         """ Get attribute or element with brackets operator """
         if isinstance(key, int) and len(self._elements) > 0:
+            self._cow_resolve()
             return self._elements[min(key, len(self._elements)-1)]
         elif isinstance(key, str) and key in self._attributes:
             return self._attributes[key]
@@ -55,6 +62,7 @@ class Page:
     def __setitem__(self, key: Union[str, int], value: Union[Element, str]) -> None:
         """ Set attribute or element with brackets operator """
         if isinstance(key, int) and isinstance(value, Element) and len(self._elements) > 0:
+            self._cow_resolve()
             self._elements[min(key, len(self._elements)-1)] = value
         elif isinstance(key, str):
             self._attributes[key] = str(value)
@@ -64,6 +72,7 @@ class Page:
         if isinstance(key, str):
             return key in self._attributes
         elif isinstance(key, Element):
+            self._cow_resolve()
             return key in self._elements
         return False
 
@@ -80,7 +89,7 @@ class Page:
         # reading order
         if (ro := tree.find('./{*}ReadingOrder')) is not None:
             if (ro_elements := tree.findall('../{*}RegionRefIndexed')) is not None:
-                page._ro = list([i.get('regionRef') for i in sorted(list(ro_elements), key=lambda i: i.get('index'))])
+                page._ro = CowList(page, [i.get('regionRef') for i in sorted(list(ro_elements), key=lambda i: i.get('index'))])
             tree.remove(ro)
         # elements
         for element in tree:
@@ -89,6 +98,7 @@ class Page:
 
     def to_etree(self) -> etree.Element:
         """ Convert the Page object to a xml etree element """
+        self._cow_resolve()
         # create page element
         page = etree.Element('Page', **self._attributes)
         # create reading order element
@@ -110,6 +120,7 @@ class Page:
     @property
     def elements(self) -> list[Self]:
         """ Get the list of elements """
+        self._cow_resolve()
         return self._elements
 
     @property
@@ -165,7 +176,8 @@ class Page:
     @reading_order.setter
     def reading_order(self, reading_order: list[str]) -> None:
         """ Set the reading order """
-        self._ro = reading_order
+        self._cow_write()
+        self._ro = CowList(self, reading_order)
 
     def set_attribute(self, key: str, value: Optional[str]) -> None:
         """ Set an attribute """
@@ -180,6 +192,7 @@ class Page:
 
     def add_element(self, element: Element, index: Optional[int] = None, reading_order: bool = True) -> None:
         """ Add an element to the elements list. """
+        self._cow_resolve()
         if index is None:
             self._elements.append(element)
             if element.is_region and reading_order and 'id' in element:
@@ -197,6 +210,7 @@ class Page:
 
     def remove_element(self, element: Union[int, Element]) -> Optional[Element]:
         """ Remove an element from the elements list """
+        self._cow_resolve()
         if isinstance(element, int) and element < len(self._elements):
             return self._elements.pop(element)
         elif isinstance(element, Element) and element in self._elements:
@@ -206,6 +220,7 @@ class Page:
 
     def get_regions(self, xmltype: Optional[XMLType] = None) -> list[Element]:
         """ Returns a list of all region elements that are direct children """
+        self._cow_resolve()
         if xmltype is None:
             return list([e for e in self._elements if e.is_region()])
         return list([e for e in self._elements if e.is_region() and e.xmltype == xmltype])
@@ -213,3 +228,4 @@ class Page:
     def clear(self):
         """ Remove all elements """
         self._elements.clear()
+        self._lazy = None
@@ -19,6 +19,7 @@ from datetime import datetime
 from lxml import etree
 
 from .page import Page
+from .cow import CopyOnWrite, CowChildren
 
 
 XMLNS = 'http://schema.primaresearch.org/PAGE/gts/pagecontent/2019-07-15'
@@ -26,12 +27,16 @@ XMLNS_XSI = 'http://www.w3.org/2001/XMLSchema-instance'
 XSI_SCHEMA_LOCATION = 'http://schema.primaresearch.org/PAGE/gts/pagecontent/2019-07-15 http://schema.primaresearch.org/PAGE/gts/pagecontent/2019-07-15/pagecontent.xsd'
 
 
-class PageXML:
+class PageXML(CopyOnWrite):
+    _cow_state = ('_creator', '_created', '_last_change', '_pages')
+    _cow_children = '_pages'
+
     def __init__(self, creator: Optional[str] = None, created: Optional[str] = None, last_change: Optional[str] = None):
+        super().__init__()
         self._creator: Optional[str] = creator
         self._created: Optional[str] = created
         self._last_change: Optional[str] = last_change
-        self._pages: list = []
+        self._pages: list = CowChildren(self)
 
     def __len__(self) -> int:
         """ Return the number of pages """
@@ -39,6 +44,7 @@ class PageXML:
 
     def __iter__(self) -> Self:
         """ Iterate through the list of pages """
+        self._cow_resolve()
         self.__n = 0
         return self
 
@@ -54,17 +60,20 @@ class PageXML:
     def __getitem__(self, key: int) -> Page | None:
         """ Get page with brackets operator """
         if len(self._pages) > 0:
+            self._cow_resolve()
             return self._pages[min(key, len(self._pages)-1)]
         return None
 
     def __setitem__(self, key: int, value: Page):
         """ Set page with brackets operator """
         if len(self._pages) > 0:
+            self._cow_resolve()
             self._pages[min(key, len(self._pages)-1)] = value
 
     def __contains__(self, key: Page) -> bool:
         """ Check if page exists """
         if isinstance(key, Page):
+            self._cow_resolve()
             return key in self._pages
         return False
 
@@ -105,6 +114,7 @@ class PageXML:
     def to_etree(self):
         """ Convert the PageXML object to a xml etree element """
         self.change()
+        self._cow_resolve()
         # create root element
         xsi_qname = etree.QName("http://www.w3.org/2001/XMLSchema-instance", 'schemaLocation')
         nsmap = {None: XMLNS, 'xsi': XMLNS_XSI}
@@ -132,6 +142,7 @@ class PageXML:
     @creator.setter
     def creator(self, creator: str) -> None:
         """ Set the creator of the PageXML file """
+        self._cow_write()
         self._creator = str(creator)
 
     @property
@@ -142,6 +153,7 @@ class PageXML:
     @created.setter
     def created(self, created: Union[str, datetime]) -> None:
         """ Set the date and time of the creation of the PageXML file (ISO format)"""
+        self._cow_write()
         if isinstance(created, datetime):
             self._created = created.isoformat()
         else:
@@ -155,6 +167,7 @@ class PageXML:
     @last_change.setter
     def last_change(self, last_change: Union[str, datetime]) -> None:
         """ Set the date and time of the last change of the PageXML file (ISO format)"""
+        self._cow_write()
         if isinstance(last_change, datetime):
             self._last_change = last_change.isoformat()
         else:
@@ -162,15 +175,18 @@ class PageXML:
 
     def change(self) -> None:
         """ Update the last_change attribute to the current time """
+        self._cow_write()
         self._last_change = datetime.now().isoformat()
 
     @property
     def pages(self) -> list[Page]:
         """ List of pages """
+        self._cow_resolve()
         return self._pages
 
     def add_page(self, page: Page, index: Optional[int] = None) -> None:
         """ Add a page to the pages list """
+        self._cow_resolve()
         if index is None:
             self._pages.append(page)
         else:
@@ -184,6 +200,7 @@ class PageXML:
 
     def remove_page(self, page: Union[Page, int]) -> Optional[Page]:
         """ Remove a page from the pages list """
+        self._cow_resolve()
         if isinstance(page, int) and page < len(self._pages):
             return self._pages.pop(page)
         elif isinstance(page, Page) and page in self._pages:
@@ -194,3 +211,4 @@ class PageXML:
     def clear(self):
         """ Remove all pages """
         self._pages.clear()
+        self._lazy = None
@@ -0,0 +1,136 @@
+import os
+import pickle
+
+import pytest
+
+from src.archive import ArchiveWriter, ArchiveReader
+from src.types import XMLType
+from src.xml import PageXML
+
+
+def document(i: int) -> PageXML:
+    pxml = PageXML.new()
+    page = pxml.create_page(imageFilename=f'image{i}.png')
+    page.create_element(XMLType.TextRegion, id=f'r{i}')
+    return pxml
+
+
+@pytest.fixture
+def archive(tmp_path):
+    fp = tmp_path / 'corpus.pxa'
+    with ArchiveWriter(fp) as writer:
+        for i in range(3):
+            writer.add(document(i), f'doc{i}.xml')
+    return fp
+
+
+def test_read(archive, tmp_path):
+    document(3).to_xml(tmp_path / 'extra.xml')
+    with ArchiveWriter(archive, append=True) as writer:
+        writer.add_xml(tmp_path / 'extra.xml')
+    reader = ArchiveReader(archive)
+    assert reader.names == ['doc0.xml', 'doc1.xml', 'doc2.xml', 'extra.xml']
+    assert reader['doc1.xml'][0].image_filename == 'image1.png'
+    assert reader[3][0].image_filename == 'image3.png'
+    assert reader.find_image('image2.png')[0][0].id == 'r2'
+    assert reader.get('missing.xml') is None
+    with pytest.raises(IndexError):
+        reader[4]
+    assert pickle.loads(pickle.dumps(reader))[0][0].image_filename == 'image0.png'
+
+
+class Index:
+    """ Integer-like key, e.g. numpy.int64 """
+    def __init__(self, value: int):
+        self.value = value
+
+    def __index__(self) -> int:
+        return self.value
+
+
+def test_integer_like_keys(archive):
+    reader = ArchiveReader(archive)
+    assert reader[Index(1)][0].image_filename == 'image1.png'
+    assert reader[-1][0].image_filename == 'image2.png'
+    with pytest.raises(IndexError):
+        reader[Index(3)]
+    with pytest.raises(TypeError):
+        reader[1.0]
+
+
+def test_append_only_writes_new_segment(archive):
+    size = archive.stat().st_size
+    with ArchiveWriter(archive, append=True) as writer:
+        writer.add(document(3), 'doc3.xml')
+        added = writer._file.tell() - size
+    with ArchiveWriter(archive, append=True):
+        pass
+    assert archive.stat().st_size - size < added + 200
+    reader = ArchiveReader(archive)
+    assert len(reader) == 4 and reader['doc3.xml'][0].image_filename == 'image3.png'
+
+
+def test_rebuild_keeps_mapped_reader(archive):
+    reader = ArchiveReader(archive)
+    reader[0]
+    with ArchiveWriter(archive) as writer:
+        writer.add(document(5), 'doc5.xml')
+    assert reader[2][0].image_filename == 'image2.png'
+    assert ArchiveReader(archive).names == ['doc5.xml']
+    with pytest.raises(RuntimeError):
+        with ArchiveWriter(archive) as writer:
+            writer.add(document(6), 'doc6.xml')
+            raise RuntimeError()
+    assert ArchiveReader(archive).names == ['doc5.xml'] and len(list(archive.parent.iterdir())) == 1
+
+
+def test_pickle_only_path(archive):
+    reader = ArchiveReader(archive)
+    assert len(pickle.dumps(reader)) < 300
+    assert pickle.loads(pickle.dumps(reader)).names == reader.names
+
+
+def test_interrupted_append_keeps_archive(archive):
+    size = archive.stat().st_size
+    writer = ArchiveWriter(archive, append=True)
+    writer.add(document(3), 'doc3.xml')
+    writer._file.flush()  # simulate a crash before close()
+    reader = ArchiveReader(archive)  # readers opened during the append see the old index
+    assert len(reader) == 3 and reader[2][0].image_filename == 'image2.png'
+    writer._file.close()
+    with ArchiveWriter(archive, append=True) as writer:
+        writer.add(document(4), 'doc4.xml')
+    assert ArchiveReader(archive).names == ['doc0.xml', 'doc1.xml', 'doc2.xml', 'doc4.xml']
+    assert archive.stat().st_size > size
+
+
+def test_exception_discards_append(archive):
+    size = archive.stat().st_size
+    with pytest.raises(RuntimeError):
+        with ArchiveWriter(archive, append=True) as writer:
+            writer.add(document(3), 'doc3.xml')
+            raise RuntimeError()
+    assert archive.stat().st_size == size and len(ArchiveReader(archive)) == 3
+
+
+@pytest.mark.parametrize('content', [b'', b'PXMLARC1\x00'])
+def test_invalid_archive(tmp_path, content):
+    fp = tmp_path / 'invalid.pxa'
+    fp.write_bytes(content)
+    with pytest.raises(ValueError, match='Not a PageXML archive'):
+        ArchiveReader(fp)
+    with pytest.raises(ValueError, match='Not a PageXML archive'):
+        ArchiveWriter(fp, append=True)
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires fork')
+def test_fork_closes_inherited_map(archive):
+    reader = ArchiveReader(archive)
+    reader[0]
+    pid = os.fork()
+    if pid == 0:
+        inherited = reader._data
+        ok = reader[1][0].image_filename == 'image1.png' and inherited.closed and reader._data is not inherited
+        os._exit(0 if ok else 1)
+    assert os.waitpid(pid, 0)[1] == 0
+    assert not reader._data.closed
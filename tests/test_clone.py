@@ -0,0 +1,226 @@
+import copy
+import pickle
+
+import pytest
+from lxml import etree
+
+from src.cow import CopyOnWrite
+from src.element import Element
+from src.page import Page
+from src.types import XMLType
+from src.xml import PageXML
+
+
+def build(regions: int = 3, lines: int = 2) -> PageXML:
+    pxml = PageXML.new()
+    page = pxml.create_page(imageFilename='image.png', imageWidth=100, imageHeight=100)
+    for r in range(regions):
+        region = page.create_element(XMLType.TextRegion, id=f'r{r}')
+        region.create_element(XMLType.Coords, points='0,0 1,1')
+        for l in range(lines):
+            line = region.create_element(XMLType.TextLine, id=f'r{r}l{l}')
+            line.create_element(XMLType.Coords, points='0,0 1,1')
+            line.text = f'text {r} {l}'
+    return pxml
+
+
+def histories(obj) -> list[int]:
+    """ Lengths of the recorded histories of an object and its descendants """
+    children = obj.__dict__.get('_elements', obj.__dict__.get('_pages', []))
+    return [len(obj._history)] + [n for child in children for n in histories(child)]
+
+
+def parse(pxml: PageXML) -> PageXML:
+    return PageXML.from_etree(etree.fromstring(etree.tostring(pxml.to_etree())))
+
+
+def serialize(pxml: PageXML) -> bytes:
+    pxml.last_change = 'fixed'
+    tree = pxml.to_etree()
+    tree.find('./{*}Metadata/{*}LastChange').text = 'fixed'
+    return etree.tostring(tree)
+
+
+@pytest.fixture(params=['built', 'parsed'])
+def pxml(request) -> PageXML:
+    return build() if request.param == 'built' else parse(build())
+
+
+def test_clone_serializes_equal(pxml):
+    assert serialize(pxml.clone()) == serialize(pxml)
+
+
+@pytest.mark.parametrize('source_side', [True, False])
+def test_set_attribute_is_isolated(pxml, source_side):
+    clone = pxml.clone()
+    a, b = (pxml, clone) if source_side else (clone, pxml)
+    a[0][0].set_attribute('custom', 'x')
+    a[0][0][1].id = 'changed'
+    assert 'custom' in a[0][0] and 'custom' not in b[0][0]
+    assert a[0][0][1].id == 'changed' and b[0][0][1].id == 'r0l0'
+
+
+@pytest.mark.parametrize('source_side', [True, False])
+def test_text_is_isolated(pxml, source_side):
+    clone = pxml.clone()
+    a, b = (pxml, clone) if source_side else (clone, pxml)
+    a[0][1][1].text = 'changed'
+    assert a[0][1][1].text == 'changed' and b[0][1][1].text == 'text 1 0'
+
+
+@pytest.mark.parametrize('source_side', [True, False])
+def test_add_and_remove_are_isolated(pxml, source_side):
+    clone = pxml.clone()
+    a, b = (pxml, clone) if source_side else (clone, pxml)
+    a[0].create_element(XMLType.TextRegion, id='new')
+    a[0][0].remove_element(0)
+    a.create_page(imageFilename='other.png')
+    assert len(a[0]) == 4 and len(b[0]) == 3
+    assert len(a[0][0]) == 2 and len(b[0][0]) == 3
+    assert len(a) == 2 and len(b) == 1
+
+
+def test_handles_taken_before_clone_are_isolated():
+    pxml = build()
+    region = pxml[0][0]
+    attributes = region.attributes
+    elements = region.elements
+    reading_order = pxml[0].reading_order
+    clone = pxml.clone()
+    region[1].text = 'changed'
+    attributes['custom'] = 'x'
+    elements.pop()
+    reading_order.append('z')
+    assert clone[0][0][1].text == 'text 0 0'
+    assert 'custom' not in clone[0][0].attributes
+    assert len(clone[0][0]) == 3
+    assert clone[0].reading_order == ['r0', 'r1', 'r2']
+    # the handles still belong to the source
+    assert 'custom' in region and len(region) == 2 and pxml[0].reading_order[-1] == 'z'
+
+
+def test_handles_taken_from_clone_are_isolated(pxml):
+    clone = pxml.clone()
+    clone[0].attributes['custom'] = 'x'
+    clone[0].reading_order.append('z')
+    clone[0].elements.pop()
+    assert 'custom' not in pxml[0] and 'z' not in pxml[0].reading_order and len(pxml[0]) == 3
+
+
+def test_remove_element_keeps_identity(pxml):
+    clone = pxml.clone()
+    for tree in (pxml, clone):
+        region = tree[0][1]
+        assert tree[0].remove_element(region) is region
+        line = tree[0][0][1]
+        assert tree[0][0].remove_element(1) is line
+        assert line not in tree[0][0]
+
+
+def test_clone_of_clone_is_isolated(pxml):
+    clone = pxml.clone()
+    clone[0][0][1].text = 'first'
+    second = clone.clone()
+    second[0][0][1].text = 'second'
+    clone[0][0][2].text = 'first'
+    assert pxml[0][0][1].text == 'text 0 0' and pxml[0][0][2].text == 'text 0 1'
+    assert clone[0][0][1].text == 'first' and clone[0][0][2].text == 'first'
+    assert second[0][0][1].text == 'second' and second[0][0][2].text == 'text 0 1'
+
+
+def test_clone_of_lazy_clone_reads_old_state():
+    pxml = build()
+    clone = pxml.clone()
+    second = clone.clone()  # clone has not resolved any children yet
+    pxml[0][0][1].text = 'changed'
+    assert clone[0][0][1].text == 'text 0 0' and second[0][0][1].text == 'text 0 0'
+
+
+def test_clone_element_and_page():
+    page = build()[0]
+    region = page[0]
+    region_clone = region.clone()
+    page_clone = page.clone()
+    region[1].text = 'changed'
+    assert isinstance(region_clone, Element) and isinstance(page_clone, Page)
+    assert region_clone[1].text == 'text 0 0' and page_clone[0][1].text == 'text 0 0'
+
+
+def test_clear_empties_list_in_place(pxml):
+    elements = pxml[0].elements
+    clone = pxml.clone()
+    pxml[0].clear()
+    assert len(elements) == 0 and len(clone[0]) == 3
+    clone[0].clear()
+    assert len(clone[0]) == 0 and len(clone[0].to_etree().findall('TextRegion')) == 0
+
+
+def test_copy_and_pickle(pxml):
+    for other in (copy.copy(pxml), copy.deepcopy(pxml), pickle.loads(pickle.dumps(pxml))):
+        other[0][0][1].text = 'changed'
+        other[0].attributes['custom'] = 'x'
+        assert pxml[0][0][1].text == 'text 0 0' and 'custom' not in pxml[0]
+        assert serialize(other.clone()) == serialize(other)
+
+
+@pytest.mark.parametrize('read', ['iterate', 'containers'])
+def test_clone_after_full_read_is_lazy(monkeypatch, read):
+    pxml = build(regions=200, lines=20)
+    # read the whole source
+    for page in pxml:
+        for region in page:
+            region.get_coords()
+            for line in region:
+                line.get_coords()
+                if read == 'containers':
+                    line.elements, line.attributes
+    calls = []
+    cow_clone = CopyOnWrite._cow_clone
+    monkeypatch.setattr(CopyOnWrite, '_cow_clone', lambda self, clock: calls.append(self) or cow_clone(self, clock))
+    for _ in range(3):
+        variant = pxml.clone()
+        variant[0][5][3].get_coords().set_attribute('points', '1,1 2,2')
+    # pxml + page + 200 regions + 21 children of one region + 1 child of one line, per variant
+    assert len(calls) == 3 * (1 + 1 + 200 + 21 + 1)
+    assert pxml[0][5][3].get_coords()['points'] == '0,0 1,1'
+
+
+def test_history_unaffected_by_unrelated_clones():
+    pxml, other = build(), build()
+    variants = []
+    for i in range(100):
+        variants.append(other.clone())
+        pxml[0].set_attribute('custom', str(i))
+        pxml[0][0][1].text = str(i)
+        pxml.to_etree()
+    assert not any(histories(pxml))
+
+
+def test_history_dropped_with_clones():
+    pxml = build()
+    variants = []
+    for i in range(100):
+        variants.append(pxml.clone())
+        variants[-1][0][1][2].text = 'variant'
+        pxml[0][0][1].text = str(i)
+        pxml.to_etree()
+    assert len(pxml[0][0][1]._history) == 100 and len(pxml._history) == 100
+    assert [variant[0][0][1].text for variant in variants[:3]] == ['text 0 0', '0', '1']
+    variants.clear()
+    assert not any(histories(pxml))
+    for i in range(100):
+        variant = pxml.clone()
+        variant[0][0][1].text = 'variant'
+        pxml[0][0][1].text = str(i)
+        del variant
+    assert not any(histories(pxml))
+
+
+def test_pickled_clone_contains_only_own_tree(pxml):
+    clone = pxml.clone()
+    pxml[0][0][1].text = 'changed'
+    data = pickle.dumps(clone)
+    assert b'changed' not in data and len(data) < 2 * len(pickle.dumps(pxml))
+    restored = pickle.loads(data)
+    assert restored[0][0][1].text == 'text 0 0' and not any(histories(restored))
+    assert '_cow_source' not in copy.deepcopy(pxml.clone()).__dict__